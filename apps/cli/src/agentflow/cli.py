@@ -2,7 +2,6 @@
 
 import typer
 from agentflow.commands import auth, org, project
-from agentflow.utils.config import get_context_string
 from agentflow.utils.output import info
 
 app = typer.Typer(
@@ -31,10 +30,6 @@ def version():
 
 def main():
     """Main entry point for the CLI."""
-    # Get context for prompt prefix (if supported)
-    context = get_context_string()
-
-    # Run the app
     app()
 
 
@@ -1,46 +1,211 @@
 """Authentication commands."""
 
+import base64
 import hashlib
-import secrets
+import hmac
+import os
+import time
 import typer
 from typing import Optional
 
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
 from agentflow.models import User, APIKey, Database
 from agentflow.storage import load_database, save_database, find_user_by_email
 from agentflow.utils.config import (
-    set_current_user_email,
+    get_argon2_params,
+    set_argon2_params,
+    set_current_session,
     set_current_api_key,
     get_current_user_email,
+    get_current_user_name,
 )
+from agentflow.utils.entropy import urandom_chunk
 from agentflow.utils.validators import validate_email
 from agentflow.utils.output import success, error, warning, info, print_table
 
 app = typer.Typer(help="Authentication commands")
 
 
-def hash_password(password: str) -> str:
-    """Hash password using SHA-256.
+# Argon2id cost parameters from the RFC 9106 "low memory" profile, used
+# until `agentflow auth calibrate` stores ones tuned to this machine
+DEFAULT_ARGON2_PARAMS = {"time_cost": 2, "memory_cost": 65536, "parallelism": 4}
+ARGON2_HASH_LEN = 32
+ARGON2_SALT_LEN = 16
+
+# Hasher for the current parameters, rebuilt only when they change
+_password_hasher: Optional[tuple[dict, PasswordHasher]] = None
+
+# Random bytes per API key, and keys drawn per os.urandom call
+API_KEY_BYTES = 32
+_API_KEY_BATCH_SIZE = 16
+
+
+def _build_password_hasher(params: dict) -> PasswordHasher:
+    """Create an Argon2id hasher for the given cost parameters."""
+    return PasswordHasher(**params, hash_len=ARGON2_HASH_LEN, salt_len=ARGON2_SALT_LEN)
+
+
+def _get_password_hasher() -> PasswordHasher:
+    """Return the hasher for the configured (or default) parameters."""
+    global _password_hasher
+
+    params = get_argon2_params() or DEFAULT_ARGON2_PARAMS
+    if _password_hasher is None or _password_hasher[0] != params:
+        # Keep a copy so in-place changes to the defaults are noticed
+        _password_hasher = (dict(params), _build_password_hasher(params))
+    return _password_hasher[1]
+
+
+def _median_hash_ms(params: dict, runs: int = 5) -> float:
+    """Median time in milliseconds to hash a password with params."""
+    # Imported lazily since only `auth calibrate` needs it
+    import statistics
+
+    hasher = _build_password_hasher(params)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter_ns()
+        hasher.hash("benchmark")
+        timings.append((time.perf_counter_ns() - start) / 1_000_000)
+    return statistics.median(timings)
 
-    Note: In production, use bcrypt or argon2.
-    For Phase 0, SHA-256 is sufficient.
+
+def calibrate_argon2(
+    target_ms: float = 450,
+    max_memory_cost: int = 2**20,
+    max_time_cost: int = 10,
+    min_memory_cost: int = 2**15,
+) -> dict:
+    """Find the strongest Argon2id parameters that hash within target_ms.
+
+    Starts at t=1, m=64 MiB with half the CPUs as lanes, doubles memory
+    while a hash stays under target_ms, then raises the time cost the same
+    way. On hosts too slow for the starting point, memory is halved down to
+    min_memory_cost instead, with a warning if even that is over target.
+    The result is saved to config and used by hash_password; existing
+    hashes are upgraded on next login.
+
+    Args:
+        target_ms: Upper bound for the median hash time
+        max_memory_cost: Largest memory cost to try, in KiB
+        max_time_cost: Largest time cost to try
+        min_memory_cost: Smallest memory cost to fall back to, in KiB
+
+    Returns:
+        The chosen PasswordHasher keyword arguments
     """
+    params = {
+        "time_cost": 1,
+        "memory_cost": 2**16,
+        "parallelism": max(1, (os.cpu_count() or 1) // 2),
+    }
+
+    elapsed_ms = _median_hash_ms(params)
+    if elapsed_ms >= target_ms:
+        while (
+            elapsed_ms >= target_ms
+            and params["memory_cost"] // 2 >= min_memory_cost
+        ):
+            params = {**params, "memory_cost": params["memory_cost"] // 2}
+            elapsed_ms = _median_hash_ms(params)
+
+        if elapsed_ms >= target_ms:
+            warning(
+                f"Hashing takes {elapsed_ms:.0f}ms even at the minimum memory "
+                f"cost ({params['memory_cost']} KiB); logins will be slower "
+                f"than {target_ms:.0f}ms"
+            )
+    else:
+        while params["memory_cost"] * 2 <= max_memory_cost:
+            candidate = {**params, "memory_cost": params["memory_cost"] * 2}
+            if _median_hash_ms(candidate) >= target_ms:
+                break
+            params = candidate
+
+        while params["time_cost"] < max_time_cost:
+            candidate = {**params, "time_cost": params["time_cost"] + 1}
+            if _median_hash_ms(candidate) >= target_ms:
+                break
+            params = candidate
+
+    set_argon2_params(params)
+    return params
+
+
+def _legacy_hash_password(password: str) -> str:
+    """Hash password with the unsalted SHA-256 scheme used before Argon2id."""
     return hashlib.sha256(password.encode()).hexdigest()
 
 
+def _is_legacy_hash(password_hash: str) -> bool:
+    """Check whether a stored hash predates the switch to Argon2id."""
+    return not password_hash.startswith("$argon2")
+
+
+def hash_password(password: str) -> str:
+    """Hash password using Argon2id.
+
+    Each call uses a fresh random salt, so hashing the same password twice
+    gives different results; use verify_password to check a password.
+    """
+    return _get_password_hasher().hash(password)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Check a password against a stored hash.
+
+    Args:
+        password_hash: Stored Argon2id (or legacy SHA-256) hash
+        password: Plaintext password to check
+
+    Returns:
+        True if the password matches, False otherwise
+    """
+    if _is_legacy_hash(password_hash):
+        return hmac.compare_digest(password_hash, _legacy_hash_password(password))
+
+    try:
+        return _get_password_hasher().verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """Check whether a stored hash should be replaced on next login.
+
+    True for legacy SHA-256 hashes and for Argon2 hashes made with
+    parameters other than the current ones.
+    """
+    if _is_legacy_hash(password_hash):
+        return True
+    return _get_password_hasher().check_needs_rehash(password_hash)
+
+
 def generate_api_key() -> str:
     """Generate a random API key."""
-    return f"afk_{secrets.token_urlsafe(32)}"
+    raw = urandom_chunk(API_KEY_BYTES, _API_KEY_BATCH_SIZE)
 
+    # Same encoding as secrets.token_urlsafe: unpadded URL-safe base64
+    token = base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+    return f"afk_{token}"
 
-@app.command()
-def register(
-    email: str = typer.Option(..., "--email", "-e", help="User email address"),
-    password: str = typer.Option(
-        ..., "--password", "-p", help="User password", hide_input=True
-    ),
-    name: str = typer.Option(..., "--name", "-n", help="User display name"),
-):
-    """Register a new user account."""
+
+def register_user(email: str, password: str, name: str) -> tuple[User, str]:
+    """Create a new user with a default API key and make them current.
+
+    Args:
+        email: User email address
+        password: Plaintext password
+        name: User display name
+
+    Returns:
+        The created user and their default API key
+
+    Raises:
+        typer.Exit if validation fails or the user already exists
+    """
     # Validate email format
     email_error = validate_email(email)
     if email_error:
@@ -78,28 +243,24 @@ def register(
     save_database(db)
 
     # Set as current user
-    set_current_user_email(email)
-    set_current_api_key(api_key.key)
+    set_current_session(email, name, api_key.key)
 
-    # Display success
-    success("User registered successfully")
-    print()
-    info(f"  Email:    {email}")
-    info(f"  Name:     {name}")
-    print()
-    warning("Save your API key now. You won't see it again!")
-    print()
-    info(f"  API Key:  {api_key.key}")
+    return user, api_key.key
 
 
-@app.command()
-def login(
-    email: str = typer.Option(..., "--email", "-e", help="User email address"),
-    password: str = typer.Option(
-        ..., "--password", "-p", help="User password", hide_input=True
-    ),
-):
-    """Login with existing credentials."""
+def login_user(email: str, password: str) -> tuple[User, APIKey]:
+    """Verify credentials and make the user current.
+
+    Args:
+        email: User email address
+        password: Plaintext password
+
+    Returns:
+        The user and the API key that was activated
+
+    Raises:
+        typer.Exit if the credentials are invalid or no API key is active
+    """
     # Find user
     user = find_user_by_email(email)
     if not user:
@@ -107,10 +268,23 @@ def login(
         raise typer.Exit(1)
 
     # Verify password
-    if user.password_hash != hash_password(password):
+    if not verify_password(user.password_hash, password):
         error("Invalid credentials")
         raise typer.Exit(1)
 
+    # Upgrade hashes from older schemes or parameters
+    if needs_rehash(user.password_hash):
+        db = load_database()
+        db.users = [
+            u.model_copy(update={"password_hash": hash_password(password)})
+            if u.id == user.id
+            else u
+            for u in db.users
+        ]
+        # Fold the old record into a fresh snapshot so a weak hash doesn't
+        # stay on disk until the log is next compacted
+        save_database(db, compact=_is_legacy_hash(user.password_hash))
+
     # Get first active API key
     active_key = None
     for api_key in user.api_keys:
@@ -123,8 +297,93 @@ def login(
         raise typer.Exit(1)
 
     # Set as current user
-    set_current_user_email(email)
-    set_current_api_key(active_key.key)
+    set_current_session(email, user.name, active_key.key)
+
+    return user, active_key
+
+
+def create_api_key(name: str) -> APIKey:
+    """Create a new API key for the current user and make it current.
+
+    Args:
+        name: API key name
+
+    Returns:
+        The created API key
+
+    Raises:
+        typer.Exit if not authenticated or the name is invalid
+    """
+    email = get_current_user_email()
+    if not email:
+        error("Not authenticated. Run: agentflow auth login")
+        raise typer.Exit(1)
+
+    if len(name) > 255:
+        error("Name must be 255 characters or less")
+        raise typer.Exit(1)
+
+    # Load database
+    db = load_database()
+
+    # Find user
+    user_index = None
+    for i, user in enumerate(db.users):
+        if user.email == email:
+            user_index = i
+            break
+
+    if user_index is None:
+        error("User not found")
+        raise typer.Exit(1)
+
+    # Create new API key
+    api_key = APIKey(key=generate_api_key(), name=name)
+
+    # Add to user (replacing the record, since loaded records are shared)
+    user = db.users[user_index]
+    db.users[user_index] = user.model_copy(
+        update={"api_keys": [*user.api_keys, api_key]}
+    )
+    save_database(db)
+
+    # Update current API key
+    set_current_api_key(api_key.key)
+
+    return api_key
+
+
+@app.command()
+def register(
+    email: str = typer.Option(..., "--email", "-e", help="User email address"),
+    password: str = typer.Option(
+        ..., "--password", "-p", help="User password", hide_input=True
+    ),
+    name: str = typer.Option(..., "--name", "-n", help="User display name"),
+):
+    """Register a new user account."""
+    _, api_key = register_user(email, password, name)
+
+    # Display success
+    success("User registered successfully")
+    print()
+    info(f"  Email:    {email}")
+    info(f"  Name:     {name}")
+    print()
+    warning("Save your API key now. You won't see it again!")
+    print()
+    info(f"  API Key:  {api_key}")
+
+
+@app.command()
+def login(
+    email: str = typer.Option(..., "--email", "-e", help="User email address"),
+    password: str = typer.Option(
+        ..., "--password", "-p", help="User password", hide_input=True
+    ),
+):
+    """Login with existing credentials."""
+    login_user(email, password)
 
     # Display success
     success(f"Logged in successfully as {email}")
@@ -201,38 +460,7 @@ def api_keys_list():
 
 def api_keys_create(name: str):
     """Create a new API key."""
-    email = get_current_user_email()
-    if not email:
-        error("Not authenticated. Run: agentflow auth login")
-        raise typer.Exit(1)
-
-    if len(name) > 255:
-        error("Name must be 255 characters or less")
-        raise typer.Exit(1)
-
-    # Load database
-    db = load_database()
-
-    # Find user
-    user_index = None
-    for i, user in enumerate(db.users):
-        if user.email == email:
-            user_index = i
-            break
-
-    if user_index is None:
-        error("User not found")
-        raise typer.Exit(1)
-
-    # Create new API key
-    api_key = APIKey(key=generate_api_key(), name=name)
-
-    # Add to user
-    db.users[user_index].api_keys.append(api_key)
-    save_database(db)
-
-    # Update current API key
-    set_current_api_key(api_key.key)
+    api_key = create_api_key(name)
 
     # Display success
     success("API key created")
@@ -244,6 +472,21 @@ def api_keys_create(name: str):
     info(f"  API Key:  {api_key.key}")
 
 
+@app.command()
+def calibrate():
+    """Tune password hashing cost to this machine."""
+    info("Benchmarking Argon2id parameters (this takes a few seconds)...")
+    params = calibrate_argon2()
+
+    success("Password hashing calibrated")
+    print()
+    info(f"  Time cost:    {params['time_cost']}")
+    info(f"  Memory cost:  {params['memory_cost'] // 1024} MiB")
+    info(f"  Parallelism:  {params['parallelism']}")
+    print()
+    info("Existing passwords are upgraded on next login.")
+
+
 @app.command()
 def status():
     """Show current authentication status."""
@@ -262,10 +505,14 @@ def status():
     # Authentication status
     if email:
         success("Authentication: ✓ Authenticated")
-        user = find_user_by_email(email)
-        if user:
+        # Fall back to the data file for sessions that predate the cached name
+        name = get_current_user_name()
+        if name is None:
+            user = find_user_by_email(email)
+            name = user.name if user else None
+        if name is not None:
             info(f"User:           {email}")
-            info(f"Name:           {user.name}")
+            info(f"Name:           {name}")
     else:
         error("Authentication: ✗ Not authenticated")
 
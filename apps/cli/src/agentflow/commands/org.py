@@ -7,6 +7,7 @@ from agentflow.models import Organization, Database
 from agentflow.storage import (
     load_database,
     save_database,
+    find_user_by_email,
     find_organization_by_slug,
     find_organizations_by_owner,
     find_projects_by_organization,
@@ -46,20 +47,14 @@ def list(
     """List all organizations for current user."""
     email = check_authenticated()
 
-    # Load database and find user
-    db = load_database()
-    user_id = None
-    for user in db.users:
-        if user.email == email:
-            user_id = user.id
-            break
-
-    if not user_id:
+    # Find user
+    user = find_user_by_email(email)
+    if not user:
         error("User not found")
         raise typer.Exit(1)
 
     # Filter by current user
-    user_orgs = [org for org in db.organizations if org.owner_id == user_id]
+    user_orgs = find_organizations_by_owner(user.id)
 
     if not user_orgs:
         info("No organizations found")
@@ -112,26 +107,19 @@ def create(
         error(f"Organization with slug '{slug}' already exists")
         raise typer.Exit(1)
 
-    # Load database and find user
-    db = load_database()
-
     # Find user by email to get their ID
-    user_id = None
-    for user in db.users:
-        if user.email == email:
-            user_id = user.id
-            break
-
-    if not user_id:
+    user = find_user_by_email(email)
+    if not user:
         error("User not found")
         raise typer.Exit(1)
 
     # Create organization
     org = Organization(
-        owner_id=user_id, name=name, slug=slug, description=description
+        owner_id=user.id, name=name, slug=slug, description=description
     )
 
     # Save to database
+    db = load_database()
     db.organizations.append(org)
     save_database(db)
 
@@ -160,14 +148,8 @@ def view(
         raise typer.Exit(1)
 
     # Check ownership (for Phase 0, allow viewing own orgs only)
-    db = load_database()
-    user_id = None
-    for user in db.users:
-        if user.email == email:
-            user_id = user.id
-            break
-
-    if org.owner_id != user_id:
+    user = find_user_by_email(email)
+    if not user or org.owner_id != user.id:
         error("Access denied")
         raise typer.Exit(1)
 
@@ -213,14 +195,8 @@ def use(
         raise typer.Exit(1)
 
     # Check ownership
-    db = load_database()
-    user_id = None
-    for user in db.users:
-        if user.email == email:
-            user_id = user.id
-            break
-
-    if org.owner_id != user_id:
+    user = find_user_by_email(email)
+    if not user or org.owner_id != user.id:
         error("Access denied")
         raise typer.Exit(1)
 
@@ -2,13 +2,29 @@
 
 from datetime import datetime, UTC
 from typing import Optional, List
-from pydantic import BaseModel, Field, EmailStr
-import uuid
+from pydantic import BaseModel, Field, field_validator
+import re
+
+from agentflow.utils.entropy import urandom_chunk
+
+# UUIDs drawn per os.urandom call
+_UUID_BATCH_SIZE = 64
 
 
 def generate_uuid() -> str:
-    """Generate a random UUID string."""
-    return str(uuid.uuid4())
+    """Generate a random (version 4) UUID string."""
+    # Set the version (4) and RFC 4122 variant bits directly rather than
+    # going through uuid.UUID, then format as 8-4-4-4-12
+    raw = bytearray(urandom_chunk(16, _UUID_BATCH_SIZE))
+    raw[6] = (raw[6] & 0x0F) | 0x40
+    raw[8] = (raw[8] & 0x3F) | 0x80
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# Structural email check (one "@", no whitespace, a dot in the domain);
+# cheaper than EmailStr, which parses each address with email-validator
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
 
 
 def now_utc() -> datetime:
@@ -31,12 +47,19 @@ class User(BaseModel):
     """User model."""
 
     id: str = Field(default_factory=generate_uuid)
-    email: EmailStr
+    email: str
     password_hash: str
     name: str
     created_at: datetime = Field(default_factory=now_utc)
     api_keys: List[APIKey] = []
 
+    @field_validator("email")
+    @classmethod
+    def _check_email(cls, value: str) -> str:
+        if not _EMAIL_RE.fullmatch(value):
+            raise ValueError("value is not a valid email address")
+        return value
+
 
 class Organization(BaseModel):
     """Organization model."""
@@ -1,41 +1,425 @@
 """Storage layer for AgentFlow CLI data."""
 
-import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from agentflow.models import Database, User, Organization, Project
+import orjson
+from pydantic import BaseModel
+
+from agentflow.models import (
+    APIKey,
+    Database,
+    User,
+    Organization,
+    Project,
+    now_utc,
+)
+from agentflow.utils.files import write_file_atomic
 
 # File paths
 DATA_DIR = Path.home() / ".agentflow"
 DATA_FILE = DATA_DIR / "data.json"
 
+# Once the change log grows past this size it is folded into DATA_FILE
+LOG_COMPACT_BYTES = 1024 * 1024
+
+# Both data files hold password hashes and API keys, so only the owner may
+# read them
+DATA_FILE_MODE = 0o600
+
+# Database fields holding records that are logged individually by id
+_RECORD_KINDS = ("users", "organizations", "projects")
+
+# Records are dumped in Python mode and orjson serializes datetimes natively,
+# writing UTC as "Z" exactly like Pydantic's JSON mode
+_JSON_OPTIONS = orjson.OPT_UTC_Z
+
+_FileState = Optional[tuple[int, int]]
+_CacheKey = tuple[Path, _FileState, _FileState]
+
+# model_dump() of every record by kind and id, as last loaded or saved
+_RecordDumps = dict[str, dict[str, dict]]
+
+
+@dataclass
+class _Indexes:
+    """Lookup tables over a Database, rebuilt whenever the cache refreshes."""
+
+    users_by_email: dict[str, User] = field(default_factory=dict)
+    orgs_by_slug: dict[str, Organization] = field(default_factory=dict)
+    orgs_by_owner: dict[str, list[Organization]] = field(default_factory=dict)
+    projects_by_org_slug: dict[tuple[str, str], Project] = field(default_factory=dict)
+    projects_by_org: dict[str, list[Project]] = field(default_factory=dict)
+
+
+# Parsed database, keyed on the data and log files' (mtime_ns, size), with
+# dumps of its records to diff saves against and its indexes once a lookup
+# has needed them. The dumps are plain data, so they still hold the stored
+# values if a caller mutates the shared record objects in place.
+_cache: Optional[tuple[_CacheKey, Database, _RecordDumps, Optional[_Indexes]]] = None
+_cache_lock = threading.RLock()
+
 
 def ensure_data_dir() -> None:
     """Create .agentflow directory if it doesn't exist."""
     DATA_DIR.mkdir(exist_ok=True)
 
 
+def _log_file() -> Path:
+    """Path of the append-only change log next to DATA_FILE."""
+    return DATA_FILE.with_suffix(".log.jsonl")
+
+
+def _file_state(path: Path) -> _FileState:
+    """Return (mtime_ns, size) for a file, or None if it doesn't exist."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _data_file_key() -> Optional[_CacheKey]:
+    """Identify the current state of the data file and its change log.
+
+    Returns:
+        Tuple of (path, snapshot state, log state), or None if neither
+        file exists
+    """
+    snapshot_state = _file_state(DATA_FILE)
+    log_state = _file_state(_log_file())
+    if snapshot_state is None and log_state is None:
+        return None
+    return (DATA_FILE, snapshot_state, log_state)
+
+
+def _replay_log(data: dict, log: bytes) -> None:
+    """Apply change log entries to snapshot data in place.
+
+    Each line is {"op": "put", "kind": ..., "record": {...}} or
+    {"op": "delete", "kind": ..., "id": ...}. A torn final line from an
+    interrupted append is ignored.
+    """
+    records = {
+        kind: {record["id"]: record for record in data.get(kind, [])}
+        for kind in _RECORD_KINDS
+    }
+
+    lines = log.split(b"\n")
+    for number, line in enumerate(lines):
+        if not line:
+            continue
+        try:
+            entry = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            if number == len(lines) - 1:
+                break
+            raise
+
+        by_id = records[entry["kind"]]
+        if entry["op"] == "put":
+            by_id[entry["record"]["id"]] = entry["record"]
+        elif entry["op"] == "delete":
+            by_id.pop(entry["id"], None)
+
+    for kind in _RECORD_KINDS:
+        data[kind] = list(records[kind].values())
+
+
+def _dump_records(db: Database) -> _RecordDumps:
+    """Dump every record in a database, keyed by kind and id."""
+    return {
+        kind: {record.id: record.model_dump() for record in getattr(db, kind)}
+        for kind in _RECORD_KINDS
+    }
+
+
+def _diff_database(old: _RecordDumps, new: Database) -> tuple[list[dict], _RecordDumps]:
+    """Compute change log entries that turn old into new.
+
+    Returns:
+        The entries, and the record dumps of new for diffing the next save
+    """
+    entries = []
+    new_dumps = {}
+    for kind in _RECORD_KINDS:
+        old_records = old[kind]
+        new_records = new_dumps[kind] = {}
+        for record in getattr(new, kind):
+            record_data = record.model_dump()
+            new_records[record.id] = record_data
+            if old_records.get(record.id) != record_data:
+                entries.append({"op": "put", "kind": kind, "record": record_data})
+        for record_id in old_records.keys() - new_records.keys():
+            entries.append({"op": "delete", "kind": kind, "id": record_id})
+    return entries, new_dumps
+
+
+def _drop_torn_line(fd: int) -> None:
+    """Truncate the change log back to its last complete line.
+
+    A crash during an append can leave a partial final line. It is ignored
+    on load, but only while it stays last, so it has to go before anything
+    else is appended after it.
+    """
+    size = os.fstat(fd).st_size
+    if size == 0 or os.pread(fd, 1, size - 1) == b"\n":
+        return
+
+    log = os.pread(fd, size, 0)
+    os.ftruncate(fd, log.rfind(b"\n") + 1)
+
+
+def _append_log(entries: list[dict]) -> None:
+    """Append entries to the change log in a single O_APPEND write.
+
+    The write is fsynced before returning, so a save that reported success
+    survives a crash or power loss.
+    """
+    payload = b"".join(
+        orjson.dumps(entry, option=_JSON_OPTIONS) + b"\n" for entry in entries
+    )
+    fd = os.open(_log_file(), os.O_RDWR | os.O_APPEND | os.O_CREAT, DATA_FILE_MODE)
+    try:
+        # The open mode is masked by the umask and ignored for existing logs
+        os.fchmod(fd, DATA_FILE_MODE)
+        _drop_torn_line(fd)
+        os.write(fd, payload)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_snapshot(db: Database) -> None:
+    """Write the full database to DATA_FILE and drop the folded change log.
+
+    The snapshot is replaced atomically. The log is only removed afterwards;
+    replaying it over the new snapshot is harmless because every entry is an
+    idempotent put or delete.
+    """
+    payload = orjson.dumps(db.model_dump(), option=_JSON_OPTIONS | orjson.OPT_INDENT_2)
+    write_file_atomic(DATA_FILE, payload, DATA_FILE_MODE)
+    _log_file().unlink(missing_ok=True)
+
+
+def _build_indexes(db: Database) -> _Indexes:
+    """Build lookup tables for a database.
+
+    Where keys collide the first record wins, matching a linear scan.
+    """
+    indexes = _Indexes()
+
+    for user in db.users:
+        indexes.users_by_email.setdefault(user.email, user)
+
+    for org in db.organizations:
+        indexes.orgs_by_slug.setdefault(org.slug, org)
+        indexes.orgs_by_owner.setdefault(org.owner_id, []).append(org)
+
+    for project in db.projects:
+        indexes.projects_by_org_slug.setdefault(
+            (project.organization_id, project.slug), project
+        )
+        indexes.projects_by_org.setdefault(project.organization_id, []).append(
+            project
+        )
+
+    return indexes
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO 8601 timestamp as written by save_database."""
+    if value is None:
+        return None
+    return datetime.fromisoformat(value)
+
+
+def _construct_record(
+    model: type[BaseModel],
+    data: dict,
+    datetime_fields: tuple[str, ...],
+    loaded_at: datetime,
+) -> BaseModel:
+    """Build a model from a stored record without running validation.
+
+    Records missing created_at get the shared load timestamp instead of
+    each firing the model's now_utc() default factory.
+    """
+    for name in datetime_fields:
+        if name in data:
+            data[name] = _parse_datetime(data[name])
+    data.setdefault("created_at", loaded_at)
+    return model.model_construct(**data)
+
+
+def _construct_database(data: dict) -> Database:
+    """Build a Database from parsed JSON, skipping Pydantic validation.
+
+    data.json is only written by save_database from already validated
+    models, so re-validating every record (including email syntax) on each
+    load is pure overhead. Writes still go through the validating model
+    constructors in the command modules.
+    """
+    loaded_at = now_utc()
+
+    users = []
+    for user_data in data.get("users", []):
+        user_data["api_keys"] = [
+            _construct_record(
+                APIKey, key_data, ("created_at", "last_used_at"), loaded_at
+            )
+            for key_data in user_data.get("api_keys", [])
+        ]
+        users.append(_construct_record(User, user_data, ("created_at",), loaded_at))
+
+    return Database.model_construct(
+        users=users,
+        organizations=[
+            _construct_record(Organization, org_data, ("created_at",), loaded_at)
+            for org_data in data.get("organizations", [])
+        ],
+        projects=[
+            _construct_record(Project, project_data, ("created_at",), loaded_at)
+            for project_data in data.get("projects", [])
+        ],
+    )
+
+
+def _read_cache_entry() -> Optional[tuple[Database, _RecordDumps]]:
+    """Return the parsed database and its record dumps, re-reading on change.
+
+    Returns:
+        Tuple of (database, record dumps), or None if there is no data file
+    """
+    global _cache
+
+    with _cache_lock:
+        key = _data_file_key()
+        if key is None:
+            return None
+
+        if _cache is not None and _cache[0] == key:
+            return _cache[1], _cache[2]
+
+        data = {}
+        if key[1] is not None:
+            data = orjson.loads(DATA_FILE.read_bytes())
+        if key[2] is not None:
+            _replay_log(data, _log_file().read_bytes())
+
+        db = _construct_database(data)
+        dumps = _dump_records(db)
+        _cache = (key, db, dumps, None)
+        return db, dumps
+
+
+def _read_cached() -> Database:
+    """Return the parsed database, re-reading the file only when it changed.
+
+    The returned object is shared with the cache and must not be mutated;
+    use load_database() to get a copy that is safe to modify and save.
+    """
+    entry = _read_cache_entry()
+    if entry is None:
+        return Database()
+    return entry[0]
+
+
+def _read_indexes() -> _Indexes:
+    """Return lookup indexes for the current database.
+
+    Indexes are built on the first lookup after the cache is refreshed, so
+    commands that only load and save never pay for them.
+    """
+    global _cache
+
+    with _cache_lock:
+        db = _read_cached()
+        if _cache is None or _cache[1] is not db:
+            # No data file yet, so nothing was cached
+            return _build_indexes(db)
+
+        if _cache[3] is None:
+            _cache = (*_cache[:3], _build_indexes(db))
+        return _cache[3]
+
+
+def _reset_cache() -> None:
+    """Forget the cached database, e.g. between tests using different files."""
+    global _cache
+
+    with _cache_lock:
+        _cache = None
+
+
+def _copy_database(db: Database) -> Database:
+    """Copy a database with fresh top-level lists.
+
+    Commands append to these lists before saving, so they must never be
+    shared with the cached instance.
+    """
+    return db.model_copy(
+        update={
+            "users": list(db.users),
+            "organizations": list(db.organizations),
+            "projects": list(db.projects),
+        }
+    )
+
+
 def load_database() -> Database:
     """Load database from JSON file.
 
-    Returns an empty Database if the file doesn't exist.
+    Returns an empty Database if the file doesn't exist. Repeated calls
+    within a process reuse the parsed data until the file changes.
+
+    The top-level lists are fresh copies, but the records in them are
+    shared with the cache. Prefer replacing a record in its list (e.g. with
+    model_copy(update=...)) over mutating it in place: save_database still
+    picks up in-place edits, but until then other lookups in this process
+    see them too.
     """
-    if not DATA_FILE.exists():
-        return Database()
+    db = _read_cached()
+    return _copy_database(db)
+
 
-    with open(DATA_FILE, "r") as f:
-        data = json.load(f)
+def save_database(db: Database, compact: bool = False) -> None:
+    """Save database to JSON file.
 
-    return Database(**data)
+    Only records that changed since the last load are appended to a change
+    log next to DATA_FILE, so a save costs O(changes) rather than rewriting
+    every record. The log is folded back into DATA_FILE once it grows past
+    LOG_COMPACT_BYTES.
 
+    Args:
+        db: Database to save
+        compact: Rewrite DATA_FILE and drop the log, e.g. so that replaced
+            secrets don't linger in older copies of a record
+    """
+    global _cache
 
-def save_database(db: Database) -> None:
-    """Save database to JSON file."""
     ensure_data_dir()
 
-    with open(DATA_FILE, "w") as f:
-        f.write(db.model_dump_json(indent=2))
+    with _cache_lock:
+        entry = _read_cache_entry() if DATA_FILE.exists() else None
+        if entry is None or compact:
+            _write_snapshot(db)
+            dumps = _dump_records(db)
+        else:
+            entries, dumps = _diff_database(entry[1], db)
+            if entries:
+                # Snapshots written before DATA_FILE_MODE may still be 0644
+                os.chmod(DATA_FILE, DATA_FILE_MODE)
+                _append_log(entries)
+                log_state = _file_state(_log_file())
+                if log_state is not None and log_state[1] > LOG_COMPACT_BYTES:
+                    _write_snapshot(db)
+
+        _cache = (_data_file_key(), _copy_database(db), dumps, None)
 
 
 def find_user_by_email(email: str) -> Optional[User]:
@@ -47,11 +431,8 @@ def find_user_by_email(email: str) -> Optional[User]:
     Returns:
         User if found, None otherwise
     """
-    db = load_database()
-    for user in db.users:
-        if user.email == email:
-            return user
-    return None
+    indexes = _read_indexes()
+    return indexes.users_by_email.get(email)
 
 
 def find_organization_by_slug(slug: str) -> Optional[Organization]:
@@ -63,11 +444,8 @@ def find_organization_by_slug(slug: str) -> Optional[Organization]:
     Returns:
         Organization if found, None otherwise
     """
-    db = load_database()
-    for org in db.organizations:
-        if org.slug == slug:
-            return org
-    return None
+    indexes = _read_indexes()
+    return indexes.orgs_by_slug.get(slug)
 
 
 def find_project_by_slug(organization_id: str, slug: str) -> Optional[Project]:
@@ -80,11 +458,8 @@ def find_project_by_slug(organization_id: str, slug: str) -> Optional[Project]:
     Returns:
         Project if found, None otherwise
     """
-    db = load_database()
-    for project in db.projects:
-        if project.organization_id == organization_id and project.slug == slug:
-            return project
-    return None
+    indexes = _read_indexes()
+    return indexes.projects_by_org_slug.get((organization_id, slug))
 
 
 def find_projects_by_organization(organization_id: str) -> list[Project]:
@@ -96,8 +471,8 @@ def find_projects_by_organization(organization_id: str) -> list[Project]:
     Returns:
         List of projects
     """
-    db = load_database()
-    return [p for p in db.projects if p.organization_id == organization_id]
+    indexes = _read_indexes()
+    return list(indexes.projects_by_org.get(organization_id, []))
 
 
 def find_organizations_by_owner(owner_id: str) -> list[Organization]:
@@ -109,8 +484,8 @@ def find_organizations_by_owner(owner_id: str) -> list[Organization]:
     Returns:
         List of organizations
     """
-    db = load_database()
-    return [org for org in db.organizations if org.owner_id == owner_id]
+    indexes = _read_indexes()
+    return list(indexes.orgs_by_owner.get(owner_id, []))
 
 
 def slug_exists_in_organizations(slug: str) -> bool:
@@ -122,8 +497,8 @@ def slug_exists_in_organizations(slug: str) -> bool:
     Returns:
         True if slug exists, False otherwise
     """
-    db = load_database()
-    return any(org.slug == slug for org in db.organizations)
+    indexes = _read_indexes()
+    return slug in indexes.orgs_by_slug
 
 
 def slug_exists_in_projects(organization_id: str, slug: str) -> bool:
@@ -136,7 +511,5 @@ def slug_exists_in_projects(organization_id: str, slug: str) -> bool:
     Returns:
         True if slug exists, False otherwise
     """
-    db = load_database()
-    return any(
-        p.organization_id == organization_id and p.slug == slug for p in db.projects
-    )
+    indexes = _read_indexes()
+    return (organization_id, slug) in indexes.projects_by_org_slug
@@ -1,37 +1,78 @@
 """Configuration file management."""
 
-import yaml
+import copy
 from pathlib import Path
 from typing import Optional
 
+from agentflow.utils.files import write_file_atomic
+
 # Config file path
 CONFIG_DIR = Path.home() / ".agentflow"
 CONFIG_FILE = CONFIG_DIR / "config.yaml"
 
+# The config holds the current API key, so only the owner may read it
+CONFIG_FILE_MODE = 0o600
+
+# Parsed config keyed on the config file's (path, mtime_ns, size)
+_cache: Optional[tuple[tuple[Path, int, int], dict]] = None
+
+
+def _config_file_key() -> Optional[tuple[Path, int, int]]:
+    """Identify the current state of the config file.
+
+    Returns:
+        Tuple of (path, mtime_ns, size), or None if the file doesn't exist
+    """
+    try:
+        stat = CONFIG_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return (CONFIG_FILE, stat.st_mtime_ns, stat.st_size)
+
 
 def load_config() -> dict:
     """Load configuration from YAML file.
 
+    The parsed file is reused within a process until it changes on disk.
+
     Returns:
         Configuration dictionary (empty if file doesn't exist)
     """
-    if not CONFIG_FILE.exists():
+    global _cache
+
+    key = _config_file_key()
+    if key is None:
         return {}
 
-    with open(CONFIG_FILE, "r") as f:
-        return yaml.safe_load(f) or {}
+    if _cache is None or _cache[0] != key:
+        # Imported lazily so commands that never touch config skip the cost
+        import yaml
+
+        with open(CONFIG_FILE, "r") as f:
+            _cache = (key, yaml.safe_load(f) or {})
+
+    # Callers update the returned dict before saving it back
+    return copy.deepcopy(_cache[1])
 
 
 def save_config(config: dict) -> None:
     """Save configuration to YAML file.
 
+    The file is replaced atomically.
+
     Args:
         config: Configuration dictionary to save
     """
+    global _cache
+
+    import yaml
+
     CONFIG_DIR.mkdir(exist_ok=True)
 
-    with open(CONFIG_FILE, "w") as f:
-        yaml.dump(config, f, default_flow_style=False)
+    payload = yaml.dump(config, default_flow_style=False).encode("utf-8")
+    write_file_atomic(CONFIG_FILE, payload, CONFIG_FILE_MODE)
+
+    _cache = (_config_file_key(), copy.deepcopy(config))
 
 
 def get_current_user_email() -> Optional[str]:
@@ -55,6 +96,30 @@ def set_current_user_email(email: str) -> None:
     save_config(config)
 
 
+def get_current_user_name() -> Optional[str]:
+    """Get current user display name from config.
+
+    Stored alongside the email at login so `auth status` can be answered
+    from config alone, without loading the data file.
+
+    Returns:
+        User name if set, None otherwise
+    """
+    config = load_config()
+    return config.get("current_user_name")
+
+
+def set_current_user_name(name: str) -> None:
+    """Set current user display name in config.
+
+    Args:
+        name: User display name
+    """
+    config = load_config()
+    config["current_user_name"] = name
+    save_config(config)
+
+
 def get_current_api_key() -> Optional[str]:
     """Get current API key from config.
 
@@ -76,6 +141,43 @@ def set_current_api_key(api_key: str) -> None:
     save_config(config)
 
 
+def set_current_session(email: str, name: str, api_key: str) -> None:
+    """Set the current user's email, name and API key in one config write.
+
+    Args:
+        email: User email address
+        name: User display name
+        api_key: API key string
+    """
+    config = load_config()
+    config["current_user_email"] = email
+    config["current_user_name"] = name
+    config["current_api_key"] = api_key
+    save_config(config)
+
+
+def get_argon2_params() -> Optional[dict]:
+    """Get calibrated Argon2 parameters from config.
+
+    Returns:
+        PasswordHasher keyword arguments if calibrated, None otherwise
+    """
+    config = load_config()
+    return config.get("auth", {}).get("argon2")
+
+
+def set_argon2_params(params: dict) -> None:
+    """Set calibrated Argon2 parameters in config.
+
+    Args:
+        params: PasswordHasher keyword arguments (time_cost, memory_cost,
+            parallelism)
+    """
+    config = load_config()
+    config.setdefault("auth", {})["argon2"] = params
+    save_config(config)
+
+
 def get_current_organization() -> Optional[str]:
     """Get current organization slug from config.
 
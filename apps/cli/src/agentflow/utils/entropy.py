@@ -0,0 +1,41 @@
+"""Batched random bytes for IDs and keys."""
+
+import os
+import threading
+
+# Unused random chunks by chunk size, drawn from os.urandom in batches so
+# that generating many IDs or keys costs one syscall per batch rather than
+# per value
+_pools: dict[int, list[bytes]] = {}
+_pools_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """Drop inherited chunks so a forked child never reuses its parent's."""
+    global _pools_lock
+
+    _pools.clear()
+    # The lock may have been held by another parent thread at fork time
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def urandom_chunk(size: int, batch: int) -> bytes:
+    """Return size cryptographically random bytes.
+
+    Args:
+        size: Number of bytes to return
+        batch: Number of chunks to draw from os.urandom when the pool for
+            this size runs empty
+
+    Returns:
+        Random bytes, never handed out to any other caller
+    """
+    with _pools_lock:
+        pool = _pools.setdefault(size, [])
+        if not pool:
+            buf = os.urandom(size * batch)
+            pool.extend(buf[i : i + size] for i in range(0, len(buf), size))
+        return pool.pop()
@@ -0,0 +1,37 @@
+"""File writing utilities."""
+
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_file_atomic(path: Path, data: bytes, mode: int = 0o600) -> None:
+    """Replace a file's contents atomically.
+
+    The data is written to a uniquely named, fsynced temporary file in the
+    same directory and renamed into place, so a crash mid-write never
+    leaves a truncated file behind and concurrent writers never share a
+    temporary file.
+
+    Args:
+        path: File to write
+        data: New file contents
+        mode: Permission bits for the file, applied regardless of umask
+    """
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent,
+        prefix=f".{path.stem}-",
+        suffix=f"{path.suffix}.tmp",
+        delete=False,
+    ) as tmp_file:
+        try:
+            os.fchmod(tmp_file.fileno(), mode)
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        except BaseException:
+            tmp_file.close()
+            os.unlink(tmp_file.name)
+            raise
+
+    os.replace(tmp_file.name, path)
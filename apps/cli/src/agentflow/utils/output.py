@@ -1,7 +1,6 @@
 """Output formatting utilities."""
 
 from rich.console import Console
-from rich.table import Table
 from typing import List, Any
 
 console = Console()
@@ -50,6 +49,8 @@ def print_table(columns: List[str], rows: List[List[str]]) -> None:
         columns: List of column headers
         rows: List of rows (each row is a list of strings)
     """
+    from rich.table import Table
+
     table = Table(show_header=True, header_style="bold magenta")
     for col in columns:
         table.add_column(col)
@@ -0,0 +1,34 @@
+"""Shared test configuration."""
+
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+
+@pytest.fixture(autouse=True, scope="session")
+def fast_password_hashing():
+    """Hash passwords with minimal Argon2id cost during tests.
+
+    The default parameters take ~100ms per hash, and most command tests
+    register or log in at least once. Hashes are still real, salted
+    Argon2id hashes, so verify_password/needs_rehash behave as in
+    production.
+    """
+    with patch.dict(
+        "agentflow.commands.auth.DEFAULT_ARGON2_PARAMS",
+        {"time_cost": 1, "memory_cost": 8, "parallelism": 1},
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Keep every test away from the developer's ~/.agentflow/config.yaml.
+
+    hash_password reads calibrated Argon2 parameters from config, so a
+    calibrated home directory would otherwise slow down (or break) tests
+    that don't set up their own config directory.
+    """
+    config_dir = tmp_path / ".agentflow"
+    monkeypatch.setattr("agentflow.utils.config.CONFIG_DIR", config_dir)
+    monkeypatch.setattr("agentflow.utils.config.CONFIG_FILE", config_dir / "config.yaml")
@@ -9,6 +9,11 @@ from agentflow.utils.config import (
     save_config,
     get_current_user_email,
     set_current_user_email,
+    get_current_user_name,
+    set_current_user_name,
+    set_current_session,
+    get_argon2_params,
+    set_argon2_params,
     get_current_api_key,
     set_current_api_key,
     get_current_organization,
@@ -23,15 +28,11 @@ from agentflow.utils.config import (
 
 
 @pytest.fixture
-def temp_config_dir(tmp_path: Path):
+def temp_config_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     """Create temporary config directory for testing."""
-
-    def mock_config_dir():
-        return tmp_path / ".agentflow"
-
-    with patch("agentflow.utils.config.CONFIG_DIR", mock_config_dir()):
-        with patch("agentflow.utils.config.CONFIG_FILE", mock_config_dir() / "config.yaml"):
-            yield
+    config_dir = tmp_path / ".agentflow"
+    monkeypatch.setattr("agentflow.utils.config.CONFIG_DIR", config_dir)
+    monkeypatch.setattr("agentflow.utils.config.CONFIG_FILE", config_dir / "config.yaml")
 
 
 class TestLoadConfig:
@@ -82,6 +83,65 @@ class TestSaveConfig:
         assert loaded_config["key"] == "value"
         assert loaded_config["nested"]["item"] == "test"
 
+    def test_does_not_leave_temp_file(self, temp_config_dir):
+        """Test that save_config replaces the config file atomically."""
+        import agentflow.utils.config
+
+        save_config({"key": "value"})
+        save_config({"key": "other"})
+
+        files = [p.name for p in agentflow.utils.config.CONFIG_DIR.iterdir()]
+        assert files == ["config.yaml"]
+
+    def test_failed_write_keeps_previous_file(self, temp_config_dir):
+        """Test that an interrupted write leaves the old config intact."""
+        import agentflow.utils.config
+
+        save_config({"key": "value"})
+        before = agentflow.utils.config.CONFIG_FILE.read_bytes()
+
+        with patch("agentflow.utils.files.os.fsync", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                save_config({"key": "other"})
+
+        assert agentflow.utils.config.CONFIG_FILE.read_bytes() == before
+        assert not list(agentflow.utils.config.CONFIG_DIR.glob("*.tmp"))
+
+    def test_config_file_is_private(self, temp_config_dir):
+        """Test that the config file is readable by the owner only."""
+        import agentflow.utils.config
+
+        save_config({"current_api_key": "afk_test"})
+
+        assert agentflow.utils.config.CONFIG_FILE.stat().st_mode & 0o777 == 0o600
+
+
+class TestConfigCache:
+    """Tests for in-process caching of the parsed config."""
+
+    def test_reloads_when_file_changes(self, temp_config_dir):
+        """Test that external changes to the config file are picked up."""
+        import agentflow.utils.config
+        import yaml
+
+        save_config({"key": "value"})
+        assert load_config() == {"key": "value"}
+
+        with open(agentflow.utils.config.CONFIG_FILE, "w") as f:
+            yaml.dump({"key": "changed", "extra": True}, f)
+
+        assert load_config() == {"key": "changed", "extra": True}
+
+    def test_loaded_config_is_isolated_from_cache(self, temp_config_dir):
+        """Test that mutating a loaded config doesn't leak into later loads."""
+        save_config({"key": "value", "nested": {"item": "test"}})
+
+        config = load_config()
+        config["key"] = "mutated"
+        config["nested"]["item"] = "mutated"
+
+        assert load_config() == {"key": "value", "nested": {"item": "test"}}
+
 
 class TestCurrentUserEmail:
     """Tests for current user email functions."""
@@ -98,6 +158,40 @@ class TestCurrentUserEmail:
         assert result == "test@example.com"
 
 
+class TestCurrentUserName:
+    """Tests for current user name functions."""
+
+    def test_get_returns_none_if_not_set(self, temp_config_dir):
+        """Test that get_current_user_name returns None if not set."""
+        result = get_current_user_name()
+        assert result is None
+
+    def test_set_and_get(self, temp_config_dir):
+        """Test setting and getting user name."""
+        set_current_user_name("Test User")
+        result = get_current_user_name()
+        assert result == "Test User"
+
+
+class TestCurrentSession:
+    """Tests for set_current_session function."""
+
+    def test_sets_all_keys_in_one_write(self, temp_config_dir):
+        """Test that email, name and API key are saved with a single write."""
+        import agentflow.utils.config
+
+        with patch(
+            "agentflow.utils.config.save_config",
+            wraps=agentflow.utils.config.save_config,
+        ) as mock_save:
+            set_current_session("test@example.com", "Test User", "afk_test_key")
+
+        assert mock_save.call_count == 1
+        assert get_current_user_email() == "test@example.com"
+        assert get_current_user_name() == "Test User"
+        assert get_current_api_key() == "afk_test_key"
+
+
 class TestCurrentAPIKey:
     """Tests for current API key functions."""
 
@@ -113,6 +207,23 @@ class TestCurrentAPIKey:
         assert result == "afk_test_key"
 
 
+class TestArgon2Params:
+    """Tests for Argon2 parameter functions."""
+
+    def test_get_returns_none_if_not_set(self, temp_config_dir):
+        """Test that get_argon2_params returns None if not calibrated."""
+        result = get_argon2_params()
+        assert result is None
+
+    def test_set_and_get(self, temp_config_dir):
+        """Test setting and getting Argon2 parameters under auth.argon2."""
+        params = {"time_cost": 3, "memory_cost": 131072, "parallelism": 2}
+        set_argon2_params(params)
+
+        assert get_argon2_params() == params
+        assert load_config()["auth"]["argon2"] == params
+
+
 class TestCurrentOrganization:
     """Tests for current organization functions."""
 
@@ -0,0 +1,62 @@
+"""Tests for batched random bytes."""
+
+import os
+import threading
+
+import pytest
+
+from agentflow.utils.entropy import urandom_chunk
+
+
+class TestUrandomChunk:
+    """Tests for urandom_chunk function."""
+
+    def test_returns_requested_size(self):
+        """Test that chunks have the requested length."""
+        assert len(urandom_chunk(16, 4)) == 16
+        assert len(urandom_chunk(32, 4)) == 32
+
+    def test_chunks_are_unique_across_refills(self):
+        """Test that no chunk is handed out twice, including across batches."""
+        chunks = [urandom_chunk(16, 8) for _ in range(100)]
+        assert len(set(chunks)) == len(chunks)
+
+    def test_concurrent_callers_get_distinct_chunks(self):
+        """Test that threads draining the same pool never fail or share chunks."""
+        results: list[bytes] = []
+        errors: list[BaseException] = []
+
+        def worker():
+            try:
+                for _ in range(200):
+                    results.append(urandom_chunk(24, 3))
+            except BaseException as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(set(results)) == len(results) == 8 * 200
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_forked_child_does_not_reuse_parent_chunks(self):
+        """Test that a forked child draws fresh bytes instead of the parent's pool."""
+        urandom_chunk(40, 16)  # Leave chunks pooled in the parent
+        read_fd, write_fd = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            os.write(write_fd, urandom_chunk(40, 16))
+            os._exit(0)
+
+        os.close(write_fd)
+        child_chunk = os.read(read_fd, 40)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+
+        assert child_chunk != urandom_chunk(40, 16)
@@ -1,6 +1,7 @@
 """Tests for data models."""
 
 import pytest
+import re
 from datetime import datetime, UTC
 from agentflow.models import (
     APIKey,
@@ -12,6 +13,12 @@ from agentflow.models import (
     now_utc,
 )
 
+# UUID format: 8-4-4-4-12 hexadecimal digits
+_UUID_RE = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$",
+    re.IGNORECASE,
+)
+
 
 class TestGenerateUUID:
     """Tests for generate_uuid function."""
@@ -30,14 +37,21 @@ class TestGenerateUUID:
     def test_generate_uuid_returns_valid_uuid_format(self):
         """Test that generate_uuid returns valid UUID format."""
         result = generate_uuid()
-        # UUID format: 8-4-4-4-12 hexadecimal digits
-        import re
+        assert _UUID_RE.match(result) is not None
 
-        uuid_pattern = re.compile(
-            r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$",
-            re.IGNORECASE,
-        )
-        assert uuid_pattern.match(result) is not None
+    def test_generate_uuid_returns_version_4(self):
+        """Test that generated UUIDs carry the v4 version and variant bits."""
+        import uuid
+
+        for _ in range(100):
+            parsed = uuid.UUID(generate_uuid())
+            assert parsed.version == 4
+            assert parsed.variant == uuid.RFC_4122
+
+    def test_generate_uuid_unique_across_batches(self):
+        """Test that IDs stay unique when the random pool is refilled."""
+        ids = {generate_uuid() for _ in range(500)}
+        assert len(ids) == 500
 
 
 class TestNowUTC:
@@ -124,6 +138,15 @@ class TestUser:
         with pytest.raises(ValueError):
             User(email="invalid-email", password_hash="hash", name="Test")
 
+    @pytest.mark.parametrize(
+        "email",
+        ["test@localhost", "a b@example.com", "a@b@example.com", "@example.com", "a@b.co\n"],
+    )
+    def test_user_email_validation_rejects_malformed(self, email):
+        """Test that User rejects addresses with whitespace, extra @ or no domain dot."""
+        with pytest.raises(ValueError):
+            User(email=email, password_hash="hash", name="Test")
+
 
 class TestOrganization:
     """Tests for Organization model."""
@@ -2,29 +2,27 @@
 
 import pytest
 from pathlib import Path
-from unittest.mock import patch
 from typer.testing import CliRunner
 
 from agentflow.commands.org import app
+from agentflow.storage import _reset_cache
 
 runner = CliRunner()
 
 
 @pytest.fixture
-def temp_dirs(tmp_path: Path):
+def temp_dirs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     """Create temporary directories for testing."""
+    data_dir = tmp_path / ".agentflow"
+    config_dir = tmp_path / ".agentflow"  # Same dir for testing
+    monkeypatch.setattr("agentflow.storage.DATA_DIR", data_dir)
+    monkeypatch.setattr("agentflow.storage.DATA_FILE", data_dir / "data.json")
+    monkeypatch.setattr("agentflow.utils.config.CONFIG_DIR", config_dir)
+    monkeypatch.setattr("agentflow.utils.config.CONFIG_FILE", config_dir / "config.yaml")
 
-    def mock_data_dir():
-        return tmp_path / ".agentflow"
+    yield
 
-    def mock_config_dir():
-        return tmp_path / ".agentflow"  # Same dir for testing
-
-    with patch("agentflow.storage.DATA_DIR", mock_data_dir()):
-        with patch("agentflow.storage.DATA_FILE", mock_data_dir() / "data.json"):
-            with patch("agentflow.utils.config.CONFIG_DIR", mock_config_dir()):
-                with patch("agentflow.utils.config.CONFIG_FILE", mock_config_dir() / "config.yaml"):
-                    yield
+    _reset_cache()
 
 
 @pytest.fixture
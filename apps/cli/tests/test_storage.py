@@ -16,6 +16,7 @@ from agentflow.storage import (
     find_organizations_by_owner,
     slug_exists_in_organizations,
     slug_exists_in_projects,
+    _reset_cache,
     DATA_DIR,
     DATA_FILE,
 )
@@ -23,15 +24,15 @@ from agentflow.models import User, Organization, Project, Database
 
 
 @pytest.fixture
-def temp_data_dir(tmp_path: Path):
+def temp_data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     """Create temporary data directory for testing."""
+    data_dir = tmp_path / ".agentflow"
+    monkeypatch.setattr("agentflow.storage.DATA_DIR", data_dir)
+    monkeypatch.setattr("agentflow.storage.DATA_FILE", data_dir / "data.json")
 
-    def mock_data_dir():
-        return tmp_path / ".agentflow"
+    yield
 
-    with patch("agentflow.storage.DATA_DIR", mock_data_dir()):
-        with patch("agentflow.storage.DATA_FILE", mock_data_dir() / "data.json"):
-            yield
+    _reset_cache()
 
 
 class TestEnsureDataDir:
@@ -105,6 +106,54 @@ class TestLoadDatabase:
         assert len(db.users) == 1
         assert db.users[0].email == "test@example.com"
 
+    def test_round_trips_nested_models_and_timestamps(self, temp_data_dir):
+        """Test that loaded records have the same types as saved ones."""
+        import agentflow.storage
+        from agentflow.models import APIKey
+
+        api_key = APIKey(key="afk_test", name="Default Key")
+        user = User(
+            email="test@example.com",
+            password_hash="hash",
+            name="Test",
+            api_keys=[api_key],
+        )
+        save_database(Database(users=[user], organizations=[], projects=[]))
+
+        # Force a re-read from disk rather than the cache populated by save
+        agentflow.storage._reset_cache()
+        db = load_database()
+
+        loaded_key = db.users[0].api_keys[0]
+        assert isinstance(loaded_key, APIKey)
+        assert loaded_key.created_at == api_key.created_at
+        assert loaded_key.last_used_at is None
+        assert db.users[0].created_at == user.created_at
+
+    def test_records_without_created_at_share_load_time(self, temp_data_dir):
+        """Test that missing timestamps are filled once per load."""
+        import agentflow.storage
+
+        test_data = {
+            "users": [],
+            "organizations": [
+                {"id": "org-1", "owner_id": "user-1", "name": "Org 1", "slug": "org-1"},
+                {"id": "org-2", "owner_id": "user-1", "name": "Org 2", "slug": "org-2"},
+            ],
+            "projects": [],
+        }
+        ensure_data_dir()
+        with open(agentflow.storage.DATA_FILE, "w") as f:
+            json.dump(test_data, f)
+
+        with patch(
+            "agentflow.storage.now_utc", wraps=agentflow.storage.now_utc
+        ) as mock_now:
+            db = load_database()
+
+        assert mock_now.call_count == 1
+        assert db.organizations[0].created_at == db.organizations[1].created_at
+
 
 class TestSaveDatabase:
     """Tests for save_database function."""
@@ -130,6 +179,292 @@ class TestSaveDatabase:
         assert len(data["users"]) == 1
         assert data["users"][0]["email"] == "test@example.com"
 
+    def test_does_not_leave_temp_file(self, temp_data_dir):
+        """Test that save_database replaces the data file atomically."""
+        import agentflow.storage
+
+        save_database(Database())
+        save_database(Database())
+
+        files = [p.name for p in agentflow.storage.DATA_DIR.iterdir()]
+        assert files == ["data.json"]
+
+    def test_data_files_are_private(self, temp_data_dir):
+        """Test that the data file and change log are readable by the owner only."""
+        import agentflow.storage
+
+        save_database(Database())
+        db = load_database()
+        db.users.append(User(email="test@example.com", password_hash="hash", name="Test"))
+        save_database(db)
+
+        for path in (agentflow.storage.DATA_FILE, agentflow.storage._log_file()):
+            assert path.stat().st_mode & 0o777 == 0o600
+
+    def test_tightens_existing_data_file(self, temp_data_dir):
+        """Test that a data file left readable by older versions is made private."""
+        import agentflow.storage
+
+        save_database(Database())
+        agentflow.storage.DATA_FILE.chmod(0o644)
+
+        db = load_database()
+        db.users.append(User(email="test@example.com", password_hash="hash", name="Test"))
+        save_database(db)
+
+        assert agentflow.storage.DATA_FILE.stat().st_mode & 0o777 == 0o600
+
+    def test_failed_write_keeps_previous_file(self, temp_data_dir):
+        """Test that an interrupted snapshot leaves the old data intact."""
+        import agentflow.storage
+
+        user = User(email="test@example.com", password_hash="hash", name="Test")
+        save_database(Database(users=[user], organizations=[], projects=[]))
+        before = agentflow.storage.DATA_FILE.read_bytes()
+
+        with patch("agentflow.storage.os.fsync", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                agentflow.storage._write_snapshot(Database())
+
+        assert agentflow.storage.DATA_FILE.read_bytes() == before
+        assert not list(agentflow.storage.DATA_DIR.glob("*.tmp"))
+
+
+class TestDatabaseCache:
+    """Tests for in-process caching of the parsed database."""
+
+    def test_reuses_parsed_database_while_file_unchanged(self, temp_data_dir):
+        """Test that repeated lookups don't re-parse an unchanged file."""
+        user = User(email="test@example.com", password_hash="hash", name="Test")
+        save_database(Database(users=[user], organizations=[], projects=[]))
+
+        first = find_user_by_email("test@example.com")
+        second = find_user_by_email("test@example.com")
+
+        assert first is second
+
+    def test_reloads_when_file_changes(self, temp_data_dir):
+        """Test that external changes to the data file are picked up."""
+        import agentflow.storage
+
+        save_database(Database())
+        assert load_database().users == []
+
+        test_data = {
+            "users": [
+                {
+                    "id": "user-1",
+                    "email": "other@example.com",
+                    "password_hash": "hash",
+                    "name": "Other User",
+                    "created_at": "2025-01-20T00:00:00Z",
+                    "api_keys": [],
+                }
+            ],
+            "organizations": [],
+            "projects": [],
+        }
+        with open(agentflow.storage.DATA_FILE, "w") as f:
+            json.dump(test_data, f)
+
+        db = load_database()
+
+        assert len(db.users) == 1
+        assert db.users[0].email == "other@example.com"
+
+    def test_builds_indexes_once_on_first_lookup(self, temp_data_dir):
+        """Test that indexes are built lazily and reused across lookups."""
+        import agentflow.storage
+
+        with patch(
+            "agentflow.storage._build_indexes", wraps=agentflow.storage._build_indexes
+        ) as mock_build:
+            save_database(Database())
+            load_database()
+            assert mock_build.call_count == 0
+
+            find_user_by_email("test@example.com")
+            find_organization_by_slug("test-org")
+            assert mock_build.call_count == 1
+
+    def test_concurrent_lookups_share_one_parse(self, temp_data_dir):
+        """Test that threads looking up at once see one cached database."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        user = User(email="test@example.com", password_hash="hash", name="Test")
+        save_database(Database(users=[user], organizations=[], projects=[]))
+        _reset_cache()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(lambda _: find_user_by_email("test@example.com"), range(32))
+            )
+
+        assert all(result is results[0] for result in results)
+
+    def test_loaded_database_is_isolated_from_cache(self, temp_data_dir):
+        """Test that mutating a loaded database doesn't leak into later loads."""
+        save_database(Database())
+
+        db = load_database()
+        db.organizations.append(
+            Organization(owner_id="user-1", name="Test Org", slug="test-org")
+        )
+
+        assert load_database().organizations == []
+        assert slug_exists_in_organizations("test-org") is False
+
+
+class TestChangeLog:
+    """Tests for the append-only change log behind save_database."""
+
+    @staticmethod
+    def _reload() -> Database:
+        """Load the database from disk, bypassing the in-process cache."""
+        import agentflow.storage
+
+        agentflow.storage._reset_cache()
+        return load_database()
+
+    def test_first_save_writes_snapshot_only(self, temp_data_dir):
+        """Test that the first save writes data.json without a log."""
+        import agentflow.storage
+
+        save_database(Database())
+
+        assert agentflow.storage.DATA_FILE.exists()
+        assert not agentflow.storage._log_file().exists()
+
+    def test_later_saves_append_changed_records(self, temp_data_dir):
+        """Test that later saves log only new records and keep the snapshot."""
+        import agentflow.storage
+
+        user1 = User(email="one@example.com", password_hash="hash", name="One")
+        save_database(Database(users=[user1], organizations=[], projects=[]))
+        snapshot = agentflow.storage.DATA_FILE.read_bytes()
+
+        db = load_database()
+        db.users.append(User(email="two@example.com", password_hash="hash", name="Two"))
+        save_database(db)
+
+        assert agentflow.storage.DATA_FILE.read_bytes() == snapshot
+        lines = agentflow.storage._log_file().read_text().splitlines()
+        assert len(lines) == 1
+        entry = json.loads(lines[0])
+        assert entry["op"] == "put"
+        assert entry["kind"] == "users"
+        assert entry["record"]["email"] == "two@example.com"
+
+        reloaded = self._reload()
+        assert [u.email for u in reloaded.users] == [
+            "one@example.com",
+            "two@example.com",
+        ]
+
+    def test_replaced_record_is_updated_in_place(self, temp_data_dir):
+        """Test that a replaced record keeps its position after replay."""
+        org1 = Organization(id="org-1", owner_id="user-1", name="Org 1", slug="org-1")
+        org2 = Organization(id="org-2", owner_id="user-1", name="Org 2", slug="org-2")
+        save_database(Database(users=[], organizations=[org1, org2], projects=[]))
+
+        db = load_database()
+        db.organizations[0] = db.organizations[0].model_copy(update={"name": "Renamed"})
+        save_database(db)
+
+        reloaded = self._reload()
+        assert [o.name for o in reloaded.organizations] == ["Renamed", "Org 2"]
+
+    def test_removed_record_is_logged_as_delete(self, temp_data_dir):
+        """Test that records dropped from the database stay dropped."""
+        project1 = Project(id="proj-1", organization_id="org-1", name="P1", slug="p1")
+        project2 = Project(id="proj-2", organization_id="org-1", name="P2", slug="p2")
+        save_database(Database(users=[], organizations=[], projects=[project1, project2]))
+
+        db = load_database()
+        db.projects.pop(0)
+        save_database(db)
+
+        reloaded = self._reload()
+        assert [p.id for p in reloaded.projects] == ["proj-2"]
+
+    def test_compacts_log_past_threshold(self, temp_data_dir):
+        """Test that an oversized log is folded back into data.json."""
+        import agentflow.storage
+
+        save_database(Database())
+
+        db = load_database()
+        db.organizations.append(
+            Organization(owner_id="user-1", name="Test Org", slug="test-org")
+        )
+        with patch("agentflow.storage.LOG_COMPACT_BYTES", 0):
+            save_database(db)
+
+        assert not agentflow.storage._log_file().exists()
+        with open(agentflow.storage.DATA_FILE, "r") as f:
+            data = json.load(f)
+        assert data["organizations"][0]["slug"] == "test-org"
+
+    def test_compact_save_folds_log_into_snapshot(self, temp_data_dir):
+        """Test that save_database(compact=True) rewrites data.json and drops the log."""
+        import agentflow.storage
+
+        save_database(Database())
+        db = load_database()
+        db.users.append(User(email="test@example.com", password_hash="hash", name="Test"))
+        save_database(db)
+        assert agentflow.storage._log_file().exists()
+
+        db = load_database()
+        db.users = [db.users[0].model_copy(update={"password_hash": "new-hash"})]
+        save_database(db, compact=True)
+
+        assert not agentflow.storage._log_file().exists()
+        data = json.loads(agentflow.storage.DATA_FILE.read_text())
+        assert data["users"][0]["password_hash"] == "new-hash"
+
+    def test_saves_records_mutated_in_place(self, temp_data_dir):
+        """Test that in-place edits to loaded records are written to disk."""
+        from agentflow.models import APIKey
+
+        user = User(email="test@example.com", password_hash="hash", name="Test")
+        save_database(Database(users=[user]))
+
+        db = load_database()
+        db.users[0].name = "Renamed"
+        db.users[0].api_keys.append(APIKey(key="afk_test", name="Test Key"))
+        save_database(db)
+
+        reloaded = self._reload()
+        assert reloaded.users[0].name == "Renamed"
+        assert [k.key for k in reloaded.users[0].api_keys] == ["afk_test"]
+
+    def test_ignores_torn_final_line(self, temp_data_dir):
+        """Test that an interrupted append doesn't break loading."""
+        import agentflow.storage
+
+        save_database(Database())
+        db = load_database()
+        db.organizations.append(
+            Organization(owner_id="user-1", name="Test Org", slug="test-org")
+        )
+        save_database(db)
+
+        with open(agentflow.storage._log_file(), "ab") as f:
+            f.write(b'{"op": "put", "kind": "orga')
+
+        reloaded = self._reload()
+        assert [o.slug for o in reloaded.organizations] == ["test-org"]
+
+        # The next save must not append after the partial line
+        reloaded.organizations.append(
+            Organization(owner_id="user-1", name="Other Org", slug="other-org")
+        )
+        save_database(reloaded)
+
+        reloaded = self._reload()
+        assert [o.slug for o in reloaded.organizations] == ["test-org", "other-org"]
+
 
 class TestFindUserByEmail:
     """Tests for find_user_by_email function."""
@@ -235,6 +570,16 @@ class TestFindProjectsByOrganization:
         assert result[0].id == "proj-1"
         assert result[1].id == "proj-3"
 
+    def test_returned_list_is_independent(self, temp_data_dir):
+        """Test that mutating the result doesn't affect later lookups."""
+        project = Project(organization_id="org-1", name="Project 1", slug="proj-1")
+        db = Database(users=[], organizations=[], projects=[project])
+        save_database(db)
+
+        find_projects_by_organization("org-1").clear()
+
+        assert len(find_projects_by_organization("org-1")) == 1
+
 
 class TestFindOrganizationsByOwner:
     """Tests for find_organizations_by_owner function."""